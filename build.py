@@ -8,22 +8,105 @@ import os
 import sys
 import subprocess
 import shutil
+import atexit
+import concurrent.futures
+import uuid
+import hashlib
+import argparse
+from importlib import metadata
 from pathlib import Path
 
-def clean_build():
-    """Clean previous build artifacts"""
-    directories_to_clean = ['build', 'dist', '__pycache__']
-    files_to_clean = ['*.spec']
+# Background pool deleting renamed build directories. The directories are
+# independent, so they are removed in parallel except on Windows, where
+# concurrent deletes scale poorly.
+_cleanup_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1 if os.name == 'nt' else 3)
+
+@atexit.register
+def _wait_for_cleanup():
+    """Wait for any background deletions still running at exit"""
+    _cleanup_pool.shutdown(wait=True)
+
+def _fast_rmtree(path):
+    """Remove a directory tree using the platform's native delete command
+
+    Falls back to shutil.rmtree if the command is not available.
+    """
+    if os.name == 'nt':
+        cmd = ['cmd', '/c', 'rd', '/s', '/q', str(path)]
+    else:
+        cmd = ['rm', '-rf', str(path)]
+    
+    try:
+        subprocess.run(cmd, check=True)
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        shutil.rmtree(path, ignore_errors=True)
+
+def clean_build(full=False):
+    """Clean previous build artifacts
+
+    By default PyInstaller's work cache in build/ and the generated spec
+    are kept so repeat builds can reuse the previous analysis. Pass
+    full=True to remove them as well.
+    """
+    if full:
+        directories_to_clean = ['build', 'dist', '__pycache__']
+    else:
+        directories_to_clean = ['dist']
+    
+    # Finish off directories left behind by an interrupted earlier run
+    for leftover in Path('.').glob('*.delete-*'):
+        if leftover.is_dir():
+            print(f"Removing leftover {leftover}...")
+            _cleanup_pool.submit(_fast_rmtree, leftover)
     
     for directory in directories_to_clean:
         if os.path.exists(directory):
             print(f"Cleaning {directory}...")
-            shutil.rmtree(directory)
+            # Rename first so the build can start right away, then delete
+            # the old tree in the background
+            renamed = f"{directory}.delete-{uuid.uuid4().hex}"
+            try:
+                os.rename(directory, renamed)
+            except OSError:
+                _fast_rmtree(directory)
+                continue
+            _cleanup_pool.submit(_fast_rmtree, renamed)
+    
+    # Clean .spec files (kept otherwise so an unchanged app.spec keeps its mtime)
+    if full:
+        for spec_file in Path('.').glob('*.spec'):
+            print(f"Removing {spec_file}")
+            spec_file.unlink()
+
+def _cache_key():
+    """Hash the build inputs to key a CI cache of PyInstaller's build/ folder"""
+    digest = hashlib.sha256()
+    
+    # build.py generates app.spec, so hashing it covers the spec contents
+    for input_file in ['main.py', 'build.py', 'requirements.txt']:
+        digest.update(input_file.encode())
+        if os.path.exists(input_file):
+            digest.update(Path(input_file).read_bytes())
     
-    # Clean .spec files
-    for spec_file in Path('.').glob('*.spec'):
-        print(f"Removing {spec_file}")
-        spec_file.unlink()
+    for package in ['pyinstaller', 'PyQt5']:
+        try:
+            version = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            version = 'missing'
+        digest.update(f"{package}=={version}".encode())
+    
+    digest.update(sys.version.encode())
+    return digest.hexdigest()
+
+def emit_cache_key():
+    """Print the cache key and expose it as a GitHub Actions step output"""
+    key = _cache_key()
+    print(f"cache_key={key}")
+    
+    github_output = os.environ.get('GITHUB_OUTPUT')
+    if github_output:
+        with open(github_output, 'a') as f:
+            f.write(f"cache_key={key}\n")
 
 def create_pyinstaller_spec():
     """Create a custom PyInstaller spec file for better control"""
@@ -39,20 +122,26 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[
-        'PyQt5.QtCore',
-        'PyQt5.QtGui', 
-        'PyQt5.QtWidgets',
-        'requests',
-        'urllib3',
-        'certifi',
-        'charset_normalizer',
-        'idna'
-    ],
+    hiddenimports=[],  # PyInstaller's PyQt5 and requests hooks find these
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=['tkinter', 'matplotlib', 'numpy', 'pandas'],
+    excludes=[
+        'tkinter',
+        'matplotlib',
+        'numpy',
+        'pandas',
+        'PyQt5.QtQml',
+        'PyQt5.QtWebEngineCore',
+        'PyQt5.QtNetwork',
+        'PyQt5.QtMultimedia',
+        'PyQt5.Qt3DCore',
+        'PyQt5.Qt3DRender',
+        'PyQt5.Qt3DInput',
+        'PyQt5.Qt3DLogic',
+        'PyQt5.Qt3DAnimation',
+        'PyQt5.Qt3DExtras',
+    ],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
@@ -71,8 +160,8 @@ exe = EXE(
     name='PyQtAutoUpdateDemo',
     debug=False,
     bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
+    strip=not sys.platform.startswith('win'),  # cheap size win on Linux/macOS
+    upx=False,  # UPX slows both the build and app startup
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,  # Set to True for debugging
@@ -85,24 +174,47 @@ exe = EXE(
 )
 '''
     
-    with open('app.spec', 'w') as f:
-        f.write(spec_content)
+    # Only rewrite the spec when it changes, so PyInstaller sees the same
+    # mtime and can reuse its cache
+    new_content = spec_content.encode()
+    try:
+        with open('app.spec', 'rb') as f:
+            if f.read() == new_content:
+                print("app.spec is up to date")
+                return
+    except FileNotFoundError:
+        pass
+    
+    with open('app.spec.tmp', 'wb') as f:
+        f.write(new_content)
+    os.replace('app.spec.tmp', 'app.spec')
     
     print("Created app.spec file")
 
+def run_pyinstaller(cmd):
+    """Run PyInstaller, echoing its output as it is produced
+
+    Returns the process exit code.
+    """
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               bufsize=1, text=True)
+    for line in process.stdout:
+        sys.stdout.write(line)
+    return process.wait()
+
 def build_application():
     """Build the application using PyInstaller"""
     print("Building application with PyInstaller...")
     
     # Method 1: Using spec file (recommended for complex apps)
     create_pyinstaller_spec()
-    result = subprocess.run([
+    returncode = run_pyinstaller([
         sys.executable, '-m', 'PyInstaller',
-        '--clean',
+        '--noconfirm',
         'app.spec'
-    ], capture_output=True, text=True)
+    ])
     
-    if result.returncode == 0:
+    if returncode == 0:
         print("✅ Build successful!")
         print(f"Executable created in: {os.path.abspath('dist')}")
         
@@ -114,8 +226,6 @@ def build_application():
                 print(f"  {item}")
     else:
         print("❌ Build failed!")
-        print("STDOUT:", result.stdout)
-        print("STDERR:", result.stderr)
         return False
     
     return True
@@ -126,6 +236,7 @@ def build_simple():
     
     cmd = [
         sys.executable, '-m', 'PyInstaller',
+        '--noconfirm',
         '--onefile',
         '--windowed',  # Remove this for console app
         '--name', 'PyQtAutoUpdateDemo',
@@ -136,17 +247,33 @@ def build_simple():
         'main.py'
     ]
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    returncode = run_pyinstaller(cmd)
     
-    if result.returncode == 0:
+    if returncode == 0:
         print("✅ Simple build successful!")
         return True
     else:
         print("❌ Simple build failed!")
-        print("STDERR:", result.stderr)
         return False
 
+def parse_args():
+    """Parse the build script's command-line options"""
+    parser = argparse.ArgumentParser(description="Build PyQt Auto-Update Demo with PyInstaller")
+    parser.add_argument('--method', choices=['spec', 'simple'], default=None,
+                        help="build method (prompted for when run interactively, otherwise 'spec')")
+    parser.add_argument('--full-clean', action='store_true',
+                        help="also remove PyInstaller's build/ cache and generated spec")
+    parser.add_argument('--cache-key', action='store_true',
+                        help="print the CI cache key for build/ and exit")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    
+    if args.cache_key:
+        emit_cache_key()
+        return
+    
     print("PyQt Auto-Update Demo - Build Script")
     print("=" * 40)
     
@@ -155,14 +282,17 @@ def main():
         print("❌ main.py not found! Please ensure the main application file exists.")
         return
     
-    # Clean previous builds
-    clean_build()
+    # Clean previous builds (--full-clean also drops PyInstaller's cache)
+    clean_build(full=args.full_clean)
     
-    # Try to build
-    build_method = input("Choose build method:\n1. Spec file (recommended)\n2. Simple command\nEnter choice (1/2): ").strip()
+    # Only prompt when someone is at the terminal, so CI never blocks
+    build_method = args.method
+    if build_method is None and sys.stdin.isatty():
+        choice = input("Choose build method:\n1. Spec file (recommended)\n2. Simple command\nEnter choice (1/2): ").strip()
+        build_method = 'simple' if choice == '2' else 'spec'
     
     success = False
-    if build_method == '2':
+    if build_method == 'simple':
         success = build_simple()
     else:
         success = build_application()
@@ -176,6 +306,7 @@ def main():
         print("4. Update the UPDATE_SERVER URL in main.py")
     else:
         print("\n💥 Build failed. Check the error messages above.")
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -2,19 +2,50 @@ import sys
 import os
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import subprocess
 import tempfile
 import hashlib
+import queue
+import threading
 from pathlib import Path
+from packaging.version import Version, InvalidVersion
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, 
                             QHBoxLayout, QWidget, QPushButton, QLabel, 
                             QTextEdit, QProgressBar, QMessageBox)
-from PyQt5.QtCore import QThread, pyqtSignal, QTimer
+from PyQt5.QtCore import QThread, pyqtSignal, QTimer, QStandardPaths
 from PyQt5.QtGui import QFont
 
 # Version of your application
 APP_VERSION = "1.0.0"
 UPDATE_SERVER = "https://api.github.com/repos/yourusername/yourrepo/releases/latest"
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+DOWNLOAD_QUEUE_SIZE = 8  # chunks buffered between network and disk
+
+# Release asset name check for the current platform, chosen once at import
+if sys.platform.startswith('win'):
+    _ASSET_MATCH = lambda name: name.endswith('.exe')
+elif sys.platform.startswith('darwin'):
+    _ASSET_MATCH = lambda name: 'mac' in name.lower()
+elif sys.platform.startswith('linux'):
+    _ASSET_MATCH = lambda name: 'linux' in name.lower()
+else:
+    _ASSET_MATCH = lambda name: False
+
+# Shared session so the update check and download reuse keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, pool_block=False))
+
+# Header fonts, created on first use (a QApplication must exist by then)
+_TITLE_FONT = None
+_VERSION_FONT = None
+
+def _get_fonts():
+    global _TITLE_FONT, _VERSION_FONT
+    if _TITLE_FONT is None:
+        _TITLE_FONT = QFont("Arial", 16, QFont.Bold)
+        _VERSION_FONT = QFont("Arial", 10)
+    return _TITLE_FONT, _VERSION_FONT
 
 class UpdateChecker(QThread):
     update_available = pyqtSignal(dict)
@@ -27,84 +58,201 @@ class UpdateChecker(QThread):
     
     def run(self):
         try:
-            response = requests.get(UPDATE_SERVER, timeout=10)
-            if response.status_code == 200:
+            # Conditional request: GitHub answers 304 with no body when the
+            # release is unchanged, and 304s don't count against the rate limit
+            cache = self.load_release_cache()
+            headers = {'If-None-Match': cache['etag']} if cache else {}
+            response = _SESSION.get(UPDATE_SERVER, headers=headers, timeout=10)
+            if response.status_code == 304 and cache:
+                release_info = cache['release_info']
+            elif response.status_code == 200:
                 release_info = response.json()
-                latest_version = release_info['tag_name'].lstrip('v')
+                self.save_release_cache(response.headers.get('ETag'), release_info)
+            else:
+                self.error_occurred.emit(f"Failed to check for updates: HTTP {response.status_code}")
+                return
+            
+            latest_version = release_info['tag_name'].lstrip('v')
+            
+            if self.is_newer_version(latest_version, self.current_version):
+                # Find the appropriate asset for the current platform, skipping
+                # the checksum files published alongside each asset
+                asset = next((asset for asset in release_info['assets']
+                              if _ASSET_MATCH(asset['name'])
+                              and not asset['name'].endswith('.sha256')), None)
                 
-                if self.is_newer_version(latest_version, self.current_version):
-                    # Find the appropriate asset for the current platform
-                    asset_url = None
-                    for asset in release_info['assets']:
-                        if sys.platform.startswith('win') and asset['name'].endswith('.exe'):
-                            asset_url = asset['browser_download_url']
-                            break
-                        elif sys.platform.startswith('darwin') and 'mac' in asset['name'].lower():
-                            asset_url = asset['browser_download_url']
-                            break
-                        elif sys.platform.startswith('linux') and 'linux' in asset['name'].lower():
-                            asset_url = asset['browser_download_url']
-                            break
+                if asset:
+                    asset_url = asset['browser_download_url']
                     
-                    if asset_url:
-                        update_info = {
-                            'version': latest_version,
-                            'url': asset_url,
-                            'notes': release_info.get('body', 'No release notes available')
-                        }
-                        self.update_available.emit(update_info)
-                    else:
-                        self.no_update.emit()
+                    # Optional checksum published as "<asset>.sha256"
+                    checksum_name = asset['name'] + '.sha256'
+                    checksum_url = next((checksum['browser_download_url'] for checksum in release_info['assets']
+                                         if checksum['name'] == checksum_name), None)
+                    
+                    update_info = {
+                        'version': latest_version,
+                        'url': asset_url,
+                        'checksum_url': checksum_url,
+                        'notes': release_info.get('body', 'No release notes available')
+                    }
+                    self.update_available.emit(update_info)
                 else:
                     self.no_update.emit()
             else:
-                self.error_occurred.emit(f"Failed to check for updates: HTTP {response.status_code}")
+                self.no_update.emit()
         except Exception as e:
             self.error_occurred.emit(f"Update check failed: {str(e)}")
     
-    def is_newer_version(self, latest, current):
-        """Simple version comparison (assumes semantic versioning)"""
-        latest_parts = [int(x) for x in latest.split('.')]
-        current_parts = [int(x) for x in current.split('.')]
+    def cache_file_path(self):
+        """Location of the cached release JSON and its ETag"""
+        cache_dir = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        return os.path.join(cache_dir, 'latest_release.json')
+    
+    def load_release_cache(self):
+        """Return the cached {'etag', 'release_info'} dict, or None"""
+        try:
+            with open(self.cache_file_path(), 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
         
-        # Pad shorter version with zeros
-        max_len = max(len(latest_parts), len(current_parts))
-        latest_parts.extend([0] * (max_len - len(latest_parts)))
-        current_parts.extend([0] * (max_len - len(current_parts)))
+        if cache.get('url') != UPDATE_SERVER or not cache.get('etag'):
+            return None
+        return cache
+    
+    def save_release_cache(self, etag, release_info):
+        """Persist the latest release JSON so the next check can send If-None-Match"""
+        if not etag:
+            return
         
-        return latest_parts > current_parts
+        cache_path = self.cache_file_path()
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump({'url': UPDATE_SERVER, 'etag': etag, 'release_info': release_info}, f)
+        except OSError:
+            # Caching is best effort; the next check just does a full fetch
+            pass
+    
+    def is_newer_version(self, latest, current):
+        """Version comparison following PEP 440 (handles pre-release tags)"""
+        try:
+            return Version(latest) > Version(current)
+        except InvalidVersion:
+            return latest > current
 
 class UpdateDownloader(QThread):
     progress_updated = pyqtSignal(int)
-    download_finished = pyqtSignal(str)
+    download_finished = pyqtSignal(str, str)
     download_failed = pyqtSignal(str)
     
-    def __init__(self, url, filename):
+    def __init__(self, url, filename, checksum_url=None):
         super().__init__()
         self.url = url
         self.filename = filename
+        self.checksum_url = checksum_url
     
     def run(self):
         try:
-            response = requests.get(self.url, stream=True)
-            total_size = int(response.headers.get('content-length', 0))
+            expected_digest = None
+            if self.checksum_url:
+                # sha256sum format: "<hex digest>  <filename>"
+                checksum_response = _SESSION.get(self.checksum_url, timeout=10)
+                checksum_response.raise_for_status()
+                checksum_fields = checksum_response.text.split()
+                if not checksum_fields:
+                    self.download_failed.emit(f"Malformed checksum file: {self.checksum_url}")
+                    return
+                expected_digest = checksum_fields[0].lower()
+            
+            # Closing the response returns its connection to the pool even if
+            # the body isn't read to the end
+            with _SESSION.get(self.url, stream=True) as response:
+                response.raise_for_status()
+                total_size = int(response.headers.get('content-length', 0))
+            
+                temp_dir = tempfile.gettempdir()
+                file_path = os.path.join(temp_dir, self.filename)
+            
+                # Hash while writing so the file doesn't need a second pass. A
+                # writer thread drains chunks to disk while this thread keeps
+                # reading from the network.
+                hasher = hashlib.sha256()
+                chunks = queue.Queue(maxsize=DOWNLOAD_QUEUE_SIZE)
+                write_errors = []
+                with self.open_download_file(file_path, total_size) as file:
+                    writer = threading.Thread(target=self._write_chunks,
+                                              args=(file, hasher, chunks, write_errors))
+                    writer.start()
+                    try:
+                        downloaded = 0
+                        last_progress = -1
+                        # Read straight from the socket in large chunks; read() only
+                        # returns b'' once the body is exhausted
+                        response.raw.decode_content = True
+                        while not write_errors:
+                            chunk = response.raw.read(DOWNLOAD_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            chunks.put(chunk)
+                            downloaded += len(chunk)
+                            if total_size > 0:
+                                # Only signal whole-percent changes so the GUI
+                                # thread isn't flooded with queued updates
+                                progress = int((downloaded / total_size) * 100)
+                                if progress != last_progress:
+                                    self.progress_updated.emit(progress)
+                                    last_progress = progress
+                    finally:
+                        chunks.put(None)
+                        writer.join()
+                
+                    # Drop any preallocated space beyond what was actually written
+                    file.truncate()
             
-            temp_dir = tempfile.gettempdir()
-            file_path = os.path.join(temp_dir, self.filename)
+            if write_errors:
+                raise write_errors[0]
             
-            with open(file_path, 'wb') as file:
-                downloaded = 0
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        file.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            progress = int((downloaded / total_size) * 100)
-                            self.progress_updated.emit(progress)
+            digest = hasher.hexdigest()
+            if expected_digest and digest != expected_digest:
+                os.remove(file_path)
+                self.download_failed.emit(f"Checksum mismatch: expected {expected_digest}, got {digest}")
+                return
             
-            self.download_finished.emit(file_path)
+            self.download_finished.emit(file_path, digest)
         except Exception as e:
             self.download_failed.emit(str(e))
+    
+    def open_download_file(self, file_path, total_size):
+        """Open file_path for writing with a buffer sized to DOWNLOAD_CHUNK_SIZE"""
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+        fd = os.open(file_path, flags, 0o644)
+        
+        # Linux: hint sequential access and preallocate to avoid fragmentation
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                if total_size > 0:
+                    os.posix_fallocate(fd, 0, total_size)
+            except OSError:
+                pass
+        
+        return os.fdopen(fd, 'wb', buffering=DOWNLOAD_CHUNK_SIZE)
+    
+    def _write_chunks(self, file, hasher, chunks, errors):
+        """Write queued chunks to file until a None sentinel is received"""
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            if errors:
+                # Keep draining so the reader never blocks on a full queue
+                continue
+            try:
+                file.write(chunk)
+                hasher.update(chunk)
+            except Exception as e:
+                errors.append(e)
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -115,8 +263,9 @@ class MainWindow(QMainWindow):
         # Initialize UI
         self.setup_ui()
         
-        # Auto-check for updates on startup (after 3 seconds)
-        QTimer.singleShot(3000, self.check_for_updates)
+        # Auto-check for updates as soon as the event loop starts; the check
+        # itself runs on an UpdateChecker thread
+        QTimer.singleShot(0, self.check_for_updates)
     
     def setup_ui(self):
         central_widget = QWidget()
@@ -126,10 +275,11 @@ class MainWindow(QMainWindow):
         
         # Header
         header_layout = QHBoxLayout()
+        title_font, version_font = _get_fonts()
         title_label = QLabel(f"PyQt Demo Application")
-        title_label.setFont(QFont("Arial", 16, QFont.Bold))
+        title_label.setFont(title_font)
         version_label = QLabel(f"Version: {APP_VERSION}")
-        version_label.setFont(QFont("Arial", 10))
+        version_label.setFont(version_font)
         
         header_layout.addWidget(title_label)
         header_layout.addStretch()
@@ -195,7 +345,6 @@ class MainWindow(QMainWindow):
     
     def on_update_available(self, update_info):
         self.status_label.setText(f"Update available: v{update_info['version']}")
-        self.check_update_btn.setEnabled(True)
         
         reply = QMessageBox.question(
             self, 
@@ -207,8 +356,12 @@ class MainWindow(QMainWindow):
             QMessageBox.Yes
         )
         
+        # Keep "Check for Updates" disabled while downloading so the checker
+        # and downloader threads never use the shared session at once
         if reply == QMessageBox.Yes:
-            self.download_update(update_info['url'])
+            self.download_update(update_info['url'], update_info.get('checksum_url'))
+        else:
+            self.check_update_btn.setEnabled(True)
     
     def on_no_update(self):
         self.status_label.setText("You have the latest version")
@@ -218,27 +371,29 @@ class MainWindow(QMainWindow):
         self.status_label.setText(f"Update check failed: {error_message}")
         self.check_update_btn.setEnabled(True)
     
-    def download_update(self, url):
+    def download_update(self, url, checksum_url=None):
         filename = os.path.basename(url)
         self.status_label.setText("Downloading update...")
         self.progress_bar.show()
         self.progress_bar.setValue(0)
         
-        self.downloader = UpdateDownloader(url, filename)
+        self.downloader = UpdateDownloader(url, filename, checksum_url)
         self.downloader.progress_updated.connect(self.progress_bar.setValue)
         self.downloader.download_finished.connect(self.on_download_finished)
         self.downloader.download_failed.connect(self.on_download_failed)
         self.downloader.start()
     
-    def on_download_finished(self, file_path):
+    def on_download_finished(self, file_path, digest):
         self.progress_bar.hide()
+        self.check_update_btn.setEnabled(True)
         self.status_label.setText("Download completed")
         
         reply = QMessageBox.question(
             self,
             "Install Update",
             f"Update downloaded successfully!\n\n"
-            f"Location: {file_path}\n\n"
+            f"Location: {file_path}\n"
+            f"SHA-256: {digest}\n\n"
             "The application will close and the new version will be installed.",
             QMessageBox.Ok | QMessageBox.Cancel,
             QMessageBox.Ok
@@ -249,6 +404,7 @@ class MainWindow(QMainWindow):
     
     def on_download_failed(self, error_message):
         self.progress_bar.hide()
+        self.check_update_btn.setEnabled(True)
         self.status_label.setText(f"Download failed: {error_message}")
         QMessageBox.critical(self, "Download Error", f"Failed to download update:\n{error_message}")
     